@@ -2,9 +2,207 @@ from xai_components.base import InArg, InCompArg, OutArg, Component, xai_compone
 from datetime import datetime
 import time
 import ssl
+import uuid
 import pika
 import sqlite3
-import json
+import logging
+import orjson
+
+log = logging.getLogger(__name__)
+
+# Loading the CA bundle is expensive; one context is shared by all RabbitMQ connections.
+_SSL_CTX = ssl.create_default_context()
+
+
+def _dumps(value):
+    return orjson.dumps(value).decode()
+
+
+_loads = orjson.loads
+
+
+def _dumps_or_none(value):
+    return _dumps(value) if value is not None else None
+
+
+def _loads_or_none(raw):
+    """Decodes a stored JSON value, returning None for malformed text instead of raising."""
+    try:
+        return _loads(raw)
+    except orjson.JSONDecodeError:
+        return None
+
+
+# Columns declared as JSON are decoded on fetch (connections need detect_types=PARSE_DECLTYPES).
+sqlite3.register_converter("JSON", _loads_or_none)
+
+
+def _as_text(value):
+    """Returns value unchanged if it is already a string, "" for None, otherwise str(value)."""
+    return value if isinstance(value, str) else ("" if value is None else str(value))
+
+
+def _coerce_task_id(value):
+    """Returns the task_id as text from an int, a plain id string, a {"task_id": ...} JSON string or a dict."""
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, str):
+        value = value.strip()
+        if not value.startswith('{'):
+            return value or None
+        try:
+            value = _loads(value)
+        except orjson.JSONDecodeError:
+            return None
+    if isinstance(value, dict):
+        task_id = value.get("task_id")
+        return str(task_id).strip() if task_id is not None else None
+    return None
+
+
+def _to_epoch_min(iso):
+    """Converts an ISO execution time (local time) to unix epoch minutes, defaulting to now."""
+    if iso:
+        return int(datetime.fromisoformat(iso).timestamp() // 60)
+    return int(time.time() // 60)
+
+
+def _from_epoch_min(minutes):
+    """Formats unix epoch minutes as YYYY-MM-DD HH:MM in local time."""
+    if isinstance(minutes, str):
+        # Legacy text value that was not migrated; show it as stored.
+        if not minutes.isdigit():
+            return minutes
+        minutes = int(minutes)
+    return datetime.fromtimestamp(minutes * 60).strftime("%Y-%m-%d %H:%M")
+
+
+def _legacy_epoch_min(value):
+    """Converts an execution_time stored by an older schema ('YYYY-MM-DD HH:MM' text) to epoch minutes."""
+    if value is None or isinstance(value, int):
+        return value
+    value = str(value).strip()
+    if value.isdigit():
+        return int(value)
+    try:
+        return _to_epoch_min(value) if value else None
+    except ValueError:
+        log.warning("Could not migrate execution_time %r; the task will not be scheduled.", value)
+        return None
+
+
+_DETAILS_TMPL = (
+    "Task ID: %s\n"
+    "Summary: %s\n"
+    "Details: %s\n"
+    "Steps: %s\n"
+    "Execution Time: %s\n"
+    "Current Step Number: %s\n"
+    "Is Active: %s\n"
+    "Is Waiting: %s"
+)
+
+_SQL_PRAGMAS = '''
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+    PRAGMA busy_timeout=5000;
+    PRAGMA foreign_keys=ON;
+'''
+
+_SQL_CREATE_TABLE = '''
+    CREATE TABLE IF NOT EXISTS tasks (
+        task_id TEXT UNIQUE NOT NULL,
+        summary TEXT NOT NULL,
+        conversation JSON,
+        details TEXT,
+        steps JSON,
+        execution_time INTEGER,
+        current_step_num INTEGER DEFAULT 0,
+        is_active BOOLEAN DEFAULT 1,
+        is_waiting BOOLEAN DEFAULT 0
+    )
+'''
+
+# Declared types the current code relies on; older databases are rebuilt on open.
+_TASKS_COLUMN_TYPES = {'conversation': 'JSON', 'steps': 'JSON', 'execution_time': 'INTEGER'}
+
+_SQL_TABLE_INFO = 'PRAGMA table_info(tasks)'
+
+_SQL_MIGRATE_TASKS = '''
+    BEGIN;
+    ALTER TABLE tasks RENAME TO tasks_legacy;
+''' + _SQL_CREATE_TABLE + ''';
+    INSERT INTO tasks (task_id, summary, conversation, details, steps, execution_time,
+                       current_step_num, is_active, is_waiting)
+    SELECT task_id, summary, conversation, details, steps, _legacy_epoch_min(execution_time),
+           current_step_num, is_active, is_waiting
+    FROM tasks_legacy;
+    DROP TABLE tasks_legacy;
+    COMMIT;
+'''
+
+_SQL_CREATE_INDEX_DUE = 'CREATE INDEX IF NOT EXISTS idx_tasks_due ON tasks(execution_time, is_active, is_waiting)'
+_SQL_CREATE_INDEX_ACTIVE = 'CREATE INDEX IF NOT EXISTS idx_tasks_active ON tasks(is_active) WHERE is_active = 1'
+
+_SQL_INSERT_TASK = '''
+    INSERT INTO tasks (task_id, summary, conversation, details, steps, execution_time)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_SELECT_TASK = '''
+    SELECT task_id, summary, conversation, details, steps, execution_time, current_step_num, is_active, is_waiting
+    FROM tasks
+    WHERE task_id = ?
+'''
+
+# NULL parameters keep the existing column value.
+_SQL_UPDATE_TASK = '''
+    UPDATE tasks
+    SET summary = COALESCE(?, summary),
+        conversation = COALESCE(?, conversation),
+        details = COALESCE(?, details),
+        steps = COALESCE(?, steps)
+    WHERE task_id = ?
+'''
+
+_SQL_DELETE_TASK = 'DELETE FROM tasks WHERE task_id = ?'
+
+# Lets SQLite assemble the whole page as one JSON array; malformed JSON columns come
+# back as null instead of failing the query. A LIMIT of -1 means no limit.
+_SQL_SELECT_ACTIVE = '''
+    SELECT json_group_array(json_object(
+        'task_id', task_id,
+        'summary', summary,
+        'conversation', CASE WHEN json_valid(conversation) THEN json(conversation) END,
+        'details', details,
+        'steps', CASE WHEN json_valid(steps) THEN json(steps) END,
+        'current_step_num', current_step_num,
+        'is_active', is_active,
+        'is_waiting', is_waiting
+    ))
+    FROM (
+        SELECT * FROM tasks
+        WHERE is_active = 1
+        ORDER BY rowid
+        LIMIT ? OFFSET ?
+    )
+'''
+
+_SQL_UPDATE_COMPLETE = 'UPDATE tasks SET is_active = 0 WHERE task_id = ?'
+_SQL_UPDATE_DEFER = 'UPDATE tasks SET is_waiting = 1 WHERE task_id = ?'
+_SQL_UPDATE_RESUME = 'UPDATE tasks SET is_waiting = 0 WHERE task_id = ?'
+
+# Claims every due task in one statement so concurrent Timer runs never
+# dispatch the same task twice.
+_SQL_CLAIM_DUE = '''
+    UPDATE tasks SET is_waiting = 1
+    WHERE execution_time <= ?
+    AND is_active = 1
+    AND is_waiting = 0
+    RETURNING task_id
+'''
 
 @xai_component
 class TasksOpenDB(Component):
@@ -20,22 +218,31 @@ class TasksOpenDB(Component):
     connection: OutArg[sqlite3.Connection]
 
     def execute(self, ctx) -> None:
-        conn = sqlite3.connect(self.db_file.value, check_same_thread=False)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tasks (
-                task_id TEXT UNIQUE NOT NULL,
-                summary TEXT NOT NULL,
-                conversation TEXT,
-                details TEXT,
-                steps TEXT,
-                execution_time TEXT,
-                current_step_num INTEGER DEFAULT 0,
-                is_active BOOLEAN DEFAULT 1,
-                is_waiting BOOLEAN DEFAULT 0
-            )
-        ''')
+        conn = sqlite3.connect(
+            self.db_file.value,
+            check_same_thread=False,
+            cached_statements=256,
+            detect_types=sqlite3.PARSE_DECLTYPES
+        )
+        conn.row_factory = sqlite3.Row
+
+        # WAL + synchronous=NORMAL avoids an fsync per commit; busy_timeout lets
+        # SQLite wait on a locked database instead of failing immediately.
+        conn.executescript(_SQL_PRAGMAS)
+
+        conn.execute(_SQL_CREATE_TABLE)
+        declared = {row[1]: row[2].upper() for row in conn.execute(_SQL_TABLE_INFO)}
+        if any(declared.get(name) != type_ for name, type_ in _TASKS_COLUMN_TYPES.items()):
+            log.warning("Migrating tasks table in %s to the current schema.", self.db_file.value)
+            conn.create_function('_legacy_epoch_min', 1, _legacy_epoch_min, deterministic=True)
+            try:
+                conn.executescript(_SQL_MIGRATE_TASKS)
+            except sqlite3.Error:
+                conn.rollback()
+                raise
+        # Supports the Timer due-task scan and TasksListActiveTasks.
+        conn.execute(_SQL_CREATE_INDEX_DUE)
+        conn.execute(_SQL_CREATE_INDEX_ACTIVE)
         conn.commit()
         self.connection.value = conn
         ctx['tasksdb_conn'] = conn
@@ -71,35 +278,80 @@ class TasksCreateTask(Component):
     def execute(self, ctx) -> None:
         conn = self.connection.value if self.connection.value is not None else ctx['tasksdb_conn']
 
-        if self.execution_time.value:
-            exec_time = datetime.fromisoformat(self.execution_time.value).strftime("%Y-%m-%d %H:%M")
-        else:
-            exec_time = datetime.now().strftime("%Y-%m-%d %H:%M")
+        exec_time = _to_epoch_min(self.execution_time.value)
 
         provided_id = self.task_id.value.strip() if self.task_id.value and self.task_id.value.strip() != "" else None
         if not provided_id:
             provided_id = str(uuid.uuid4())
 
-        cursor = conn.cursor()
         try:
-            cursor.execute('''
-                INSERT INTO tasks (task_id, summary, conversation, details, steps, execution_time)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                provided_id,
-                self.summary.value,
-                json.dumps(self.conversation.value),
-                self.details.value,
-                json.dumps(self.steps.value),
-                exec_time
-            ))
+            with conn:
+                conn.execute(_SQL_INSERT_TASK, (
+                    provided_id,
+                    self.summary.value,
+                    _dumps_or_none(self.conversation.value),
+                    self.details.value,
+                    _dumps_or_none(self.steps.value),
+                    exec_time
+                ))
         except sqlite3.IntegrityError as e:
             self.result.value = f" Error: The provided task ID '{provided_id}' is already in use. {e}"
             return
-        conn.commit()
         self.task_id_out.value = provided_id
         self.result.value = f" Task with ID {provided_id} created successfully."
 
+@xai_component
+class TasksCreateTasks(Component):
+    """Creates several tasks in the database in a single transaction.
+
+    ##### inPorts:
+    - connection: SQLite database connection.
+    - tasks: List of task dictionaries with the keys summary and details, and optionally
+      task_id, conversation, steps and execution_time (same meaning as in TasksCreateTask).
+
+    ##### outPorts:
+    - task_ids_out: The task_ids of the newly created tasks.
+    - result: A text message indicating the success of the task creation.
+    """
+
+    connection: InArg[sqlite3.Connection]
+    tasks: InCompArg[list]
+    task_ids_out: OutArg[list]
+    result: OutArg[str]
+
+    def execute(self, ctx) -> None:
+        conn = self.connection.value if self.connection.value is not None else ctx['tasksdb_conn']
+
+        rows = []
+        for index, task in enumerate(self.tasks.value):
+            if not isinstance(task, dict) or "summary" not in task or "details" not in task:
+                self.result.value = f" Error: Task at index {index} must be a dictionary with 'summary' and 'details'; no tasks were created."
+                return
+            task_id = task.get("task_id")
+            task_id = str(task_id).strip() if task_id is not None else ""
+            try:
+                exec_time = _to_epoch_min(task.get("execution_time"))
+            except (TypeError, ValueError) as e:
+                self.result.value = f" Error: Task at index {index} has an invalid execution_time; no tasks were created. {e}"
+                return
+            rows.append((
+                task_id or str(uuid.uuid4()),
+                task["summary"],
+                _dumps_or_none(task.get("conversation", [])),
+                task["details"],
+                _dumps_or_none(task.get("steps", [])),
+                exec_time
+            ))
+
+        try:
+            with conn:
+                conn.executemany(_SQL_INSERT_TASK, rows)
+        except sqlite3.IntegrityError as e:
+            self.result.value = f" Error: One of the provided task IDs is already in use, no tasks were created. {e}"
+            return
+        self.task_ids_out.value = [row[0] for row in rows]
+        self.result.value = f" {len(rows)} tasks created successfully."
+
 @xai_component
 class TasksGetTaskDetails(Component):
     """
@@ -107,15 +359,16 @@ class TasksGetTaskDetails(Component):
 
     ##### inPorts:
     - connection: SQLite database connection.
-    - task_id: Task ID as a JSON string (expects {"task_id": "some_id"}) or as a dict or as an int.
+    - task_id: Task ID as a plain string, a JSON string (expects {"task_id": "some_id"}), a dict or an int.
 
     ##### outPorts:
-    - task_details: A formatted string containing task details.
+    - task_details: A formatted string containing task details, or an error message if no task ID could be read
+      from the input (e.g. a Timer {"task_ids": [...]} payload, which must be split into one call per ID).
     - summary: Brief description of the task.
     - conversation: List of conversation history.
     - details: Detailed description of the task.
     - steps: List of task steps.
-    - execution_time: The execution time as a string.
+    - execution_time: The execution time as a string (YYYY-MM-DD HH:MM).
     - current_step_num: Current step number.
     - is_active: Whether the task is active.
     - is_waiting: Whether the task is waiting.
@@ -135,77 +388,40 @@ class TasksGetTaskDetails(Component):
 
     def execute(self, ctx) -> None:
         conn = self.connection.value if self.connection.value is not None else ctx['tasksdb_conn']
-        cursor = conn.cursor()
-
-        print(f"Received task_id input: {self.task_id.value}")
-
-        if isinstance(self.task_id.value, int):
-            task_data = {"task_id": self.task_id.value}
-        elif isinstance(self.task_id.value, dict):
-            task_data = self.task_id.value
-        elif isinstance(self.task_id.value, str):
-            try:
-                task_data = json.loads(self.task_id.value)
-            except (ValueError, json.JSONDecodeError) as e:
-                try:
-                    task_data = {"task_id": int(self.task_id.value.strip())}
-                except Exception as ex:
-                    print(f"Error parsing task_id from string. Received: {self.task_id.value}. Error: {ex}")
-                    self.task_details.value = None
-                    return
-        else:
-            print(f"Unsupported type for task_id: {type(self.task_id.value)}")
-            self.task_details.value = None
-            return
 
-        task_id_val = task_data.get("task_id", None)
-        if task_id_val is None:
-            print(f"task_id key not found in input: {task_data}")
-            self.task_details.value = None
+        task_id_text = _coerce_task_id(self.task_id.value)
+        if task_id_text is None:
+            log.debug("Could not parse task_id from input: %r", self.task_id.value)
+            self.task_details.value = (
+                f"Could not read a task ID from {self.task_id.value!r}. "
+                'Send one task at a time as {"task_id": "some_id"}.'
+            )
             return
 
-        task_id_text = str(task_id_val).strip()
-
-        cursor.execute('''
-            SELECT task_id, summary, conversation, details, steps, execution_time, current_step_num, is_active, is_waiting
-            FROM tasks
-            WHERE task_id = ?
-        ''', (task_id_text,))
-        row = cursor.fetchone()
+        row = conn.execute(_SQL_SELECT_TASK, (task_id_text,)).fetchone()
         if row:
-            try:
-                conversation_data = json.loads(row[2]) if row[2] else []
-            except Exception:
-                conversation_data = []
-            try:
-                steps_data = json.loads(row[4]) if row[4] else []
-            except Exception:
-                steps_data = []
-
-            formatted_details = (
-                f"Task ID: {row[0]}\n"
-                f"Summary: {row[1]}\n"
-                f"Details: {row[3]}\n"
-                f"Steps: {', '.join(map(str, steps_data))}\n"
-                f"Execution Time: {row[5]}\n"
-                f"Current Step Number: {row[6]}\n"
-                f"Is Active: {row[7]}\n"
-                f"Is Waiting: {row[8]}"
+            conversation_data = row[2] or []
+            steps_data = row[4] or []
+            execution_time = _from_epoch_min(row[5]) if row[5] is not None else None
+
+            self.task_details.value = _DETAILS_TMPL % (
+                row[0], row[1], row[3],
+                steps_data if isinstance(steps_data, str) else ", ".join(map(str, steps_data)),
+                execution_time, row[6], row[7], row[8]
             )
-            self.task_details.value = formatted_details
 
             self.summary.value = row[1]
             self.conversation.value = conversation_data
             self.details.value = row[3]
             self.steps.value = steps_data
-            self.execution_time.value = row[5]
+            self.execution_time.value = execution_time
             self.current_step_num.value = row[6]
             self.is_active.value = row[7]
             self.is_waiting.value = row[8]
 
-            print(f"Task {task_id_text} details retrieved successfully.")
+            log.debug("Task %s details retrieved successfully.", task_id_text)
         else:
-            print(f"No task found with id: {task_id_text}")
+            log.debug("No task found with id: %s", task_id_text)
             self.task_details.value = f"No task found with ID {task_id_text}."
 
 @xai_component
@@ -226,9 +442,8 @@ class TasksDeleteTask(Component):
 
     def execute(self, ctx) -> None:
         conn = self.connection.value if self.connection.value is not None else ctx['tasksdb_conn']
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM tasks WHERE task_id = ?', (self.task_id.value,))
-        conn.commit()
+        with conn:
+            conn.execute(_SQL_DELETE_TASK, (self.task_id.value,))
         self.result.value = f"Task with ID {self.task_id.value} deleted successfully."
 
 @xai_component
@@ -253,52 +468,44 @@ class TasksUpdateTask(Component):
 
     def execute(self, ctx) -> None:
         conn = self.connection.value if self.connection.value is not None else ctx['tasksdb_conn']
-        cursor = conn.cursor()
 
-        cursor.execute('SELECT task_id, summary, conversation, details, steps FROM tasks WHERE task_id = ?', (self.task_id.value,))
-        row = cursor.fetchone()
-        if row:
-            summary = self.summary.value if self.summary.value is not None else row[1]
-            conversation = self.conversation.value if self.conversation.value is not None else json.loads(row[2])
-            details = self.details.value if self.details.value is not None else row[3]
-            steps = self.steps.value if self.steps.value is not None else json.loads(row[4])
-
-            cursor.execute('''
-                UPDATE tasks
-                SET summary = ?, conversation = ?, details = ?, steps = ?
-                WHERE task_id = ?
-            ''', (summary, json.dumps(conversation), details, json.dumps(steps), self.task_id.value))
-        conn.commit()
+        with conn:
+            conn.execute(_SQL_UPDATE_TASK, (
+                self.summary.value,
+                _dumps_or_none(self.conversation.value),
+                self.details.value,
+                _dumps_or_none(self.steps.value),
+                self.task_id.value
+            ))
 
 @xai_component
 class TasksListActiveTasks(Component):
-    """Retrieves a list of all active tasks from the database.
+    """Retrieves a list of active tasks from the database, optionally one page at a time.
 
     ##### inPorts:
     - connection: SQLite database connection
+    - limit: (Optional) Maximum number of tasks to return. Defaults to all tasks.
+    - offset: (Optional) Number of active tasks to skip. Defaults to 0.
 
     ##### outPorts:
     - active_tasks: List of dictionaries containing active task details
     """
 
     connection: InArg[sqlite3.Connection]
+    limit: InArg[int]
+    offset: InArg[int]
     active_tasks: OutArg[list]  # Output list of active tasks
 
     def execute(self, ctx) -> None:
         conn = self.connection.value if self.connection.value is not None else ctx['tasksdb_conn']
-        cursor = conn.cursor()
-        cursor.execute('SELECT task_id, summary, conversation, details, steps, current_step_num, is_active, is_waiting FROM tasks WHERE is_active = 1')
-        rows = cursor.fetchall()
-        self.active_tasks.value = [{
-            'task_id': row[0],
-            'summary': row[1],
-            'conversation': json.loads(row[2]),
-            'details': row[3],
-            'steps': json.loads(row[4]),
-            'current_step_num': row[5],
-            'is_active': row[6],
-            'is_waiting': row[7]
-        } for row in rows]
+        limit = self.limit.value if self.limit.value is not None else -1
+        offset = self.offset.value or 0
+
+        cur = conn.execute(_SQL_SELECT_ACTIVE, (limit, offset))
+        try:
+            self.active_tasks.value = _loads(cur.fetchone()[0])
+        finally:
+            cur.close()
 
 @xai_component
 class TasksCompleteTask(Component):
@@ -318,23 +525,12 @@ class TasksCompleteTask(Component):
 
     def execute(self, ctx) -> None:
         conn = self.connection.value if self.connection.value is not None else ctx['tasksdb_conn']
-        cursor = conn.cursor()
 
-        max_retries = 5
-        retry_delay = 0.5
-        for attempt in range(max_retries):
-            try:
-                cursor.execute('UPDATE tasks SET is_active = 0 WHERE task_id = ?', (self.task_id.value,))
-                conn.commit()
-                break
-            except sqlite3.OperationalError as e:
-                if "database is locked" in str(e):
-                    print(f"Database is locked. Retrying in {retry_delay} seconds (Attempt {attempt+1}/{max_retries})...")
-                    time.sleep(retry_delay)
-                else:
-                    raise
-
-        if cursor.rowcount > 0:
+        # Lock contention is handled by SQLite itself through PRAGMA busy_timeout.
+        with conn:
+            cur = conn.execute(_SQL_UPDATE_COMPLETE, (self.task_id.value,))
+
+        if cur.rowcount > 0:
             self.result.value = f"Task with ID {self.task_id.value} has been marked as completed."
         else:
             self.result.value = f"Task with ID {self.task_id.value} not found or already completed."
@@ -353,9 +549,8 @@ class TasksDeferTask(Component):
 
     def execute(self, ctx) -> None:
         conn = self.connection.value if self.connection.value is not None else ctx['tasksdb_conn']
-        cursor = conn.cursor()
-        cursor.execute('UPDATE tasks SET is_waiting = 1 WHERE task_id = ?', (self.task_id.value,))
-        conn.commit()
+        with conn:
+            conn.execute(_SQL_UPDATE_DEFER, (self.task_id.value,))
 
 @xai_component
 class TasksResumeTask(Component):
@@ -371,9 +566,8 @@ class TasksResumeTask(Component):
 
     def execute(self, ctx) -> None:
         conn = self.connection.value if self.connection.value is not None else ctx['tasksdb_conn']
-        cursor = conn.cursor()
-        cursor.execute('UPDATE tasks SET is_waiting = 0 WHERE task_id = ?', (self.task_id.value,))
-        conn.commit()
+        with conn:
+            conn.execute(_SQL_UPDATE_RESUME, (self.task_id.value,))
 
 
 @xai_component
@@ -400,36 +594,31 @@ class Timer(Component):
     - connection: Open SQLite database connection.
 
     ##### outPorts:
-    - sent_task_id: A JSON string containing the task_id of the task ready for execution.
+    - sent_task_id: A JSON string {"task_ids": [...]} with every task ready for execution, or an empty
+      string if none are due. Dispatched tasks are marked as waiting so they are not sent again;
+      the flag is not reset automatically, so a task whose execution fails must be re-queued with TasksResumeTask.
     """
     connection: InArg[sqlite3.Connection]
     sent_task_id: OutArg[str]
 
     def execute(self, ctx) -> None:
         conn = self.connection.value if self.connection.value is not None else ctx["tasksdb_conn"]
-        cursor = conn.cursor()
-
-        # Get the current time in the correct format (YYYY-MM-DD HH:MM)
-        now = datetime.now().strftime("%Y-%m-%d %H:%M")
-        print("Timer (on demand): Checking tasks at", now)
-
-        cursor.execute("""
-            SELECT task_id FROM tasks
-            WHERE execution_time <= ?
-            AND is_active = 1
-            AND is_waiting = 0
-        """, (now,))
-
-        tasks = cursor.fetchall()
-
-        if tasks:
-            for task in tasks:
-                task_id = task[0]
-                print(f"Timer (on demand): Task {task_id} is ready for execution.")
-                self.sent_task_id.value = json.dumps({"task_id": task_id})
-                # Optionally, update the task status here to prevent re-sending.
+
+        # Current time in unix epoch minutes, matching the stored execution_time
+        now = int(time.time() // 60)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("Timer (on demand): Checking tasks at %s", _from_epoch_min(now))
+
+        with conn:
+            tasks = conn.execute(_SQL_CLAIM_DUE, (now,)).fetchall()
+
+        due_ids = [task[0] for task in tasks]
+        if due_ids:
+            log.debug("Timer (on demand): Tasks %s are ready for execution.", due_ids)
+            self.sent_task_id.value = _dumps({"task_ids": due_ids})
         else:
-            print("Timer (on demand): No active tasks are ready for execution.")
+            log.debug("Timer (on demand): No active tasks are ready for execution.")
+            self.sent_task_id.value = ""
 
 @xai_component()
 class ExtractTaskDetails(Component):
@@ -464,19 +653,19 @@ class ExtractTaskDetails(Component):
     execution_time: OutArg[str]
 
     def execute(self, ctx) -> None:
-        input_data = json.loads(self.input_json.value)
-
-        self.task_id.value = str(input_data.get("task_id", ""))
-        self.summary.value = str(input_data.get("summary", ""))
-        self.details.value = str(input_data.get("details", ""))
-        self.steps.value = input_data.get("steps", [])
-        self.execution_time.value = str(input_data.get("execution_time", ""))
-
-        print(f"Task ID: {self.task_id.value}")
-        print(f"Task Summary: {self.summary.value}")
-        print(f"Details: {self.details.value}")
-        print(f"Steps: {self.steps.value}")
-        print(f"Execution Time: {self.execution_time.value}")
+        get = _loads(self.input_json.value).get
+
+        self.task_id.value = _as_text(get("task_id"))
+        self.summary.value = _as_text(get("summary"))
+        self.details.value = _as_text(get("details"))
+        self.steps.value = get("steps", [])
+        self.execution_time.value = _as_text(get("execution_time"))
+
+        log.debug(
+            "Extracted task: id=%s summary=%s details=%s steps=%s execution_time=%s",
+            self.task_id.value, self.summary.value, self.details.value,
+            self.steps.value, self.execution_time.value
+        )
 
 @xai_component
 class RabbitMQConnect(Component):
@@ -487,7 +676,7 @@ class RabbitMQConnect(Component):
     vhost: InArg[str]
 
     def execute(self, ctx) -> None:
-        ssl_context = ssl.create_default_context()
+        ssl_context = _SSL_CTX
 
         credentials = pika.PlainCredentials(self.username.value, self.password.value)
         parameters = pika.ConnectionParameters(
@@ -500,26 +689,48 @@ class RabbitMQConnect(Component):
 
         client = pika.BlockingConnection(parameters)
         ctx['rabbitmq_client'] = client
+        ctx['rabbitmq_params'] = parameters
         ctx['rabbitmq_channel'] = client.channel()
 
 @xai_component
 class RabbitMQPublish(Component):
+    """Publishes a message using the channel opened by RabbitMQConnect.
+
+    ##### inPorts:
+    - queue: The queue to declare before the first publish.
+    - routing_key: The routing key for the message.
+    - exchange: The exchange to publish to (defaults to the default exchange).
+    - message: The message body.
+    - skip_empty: (Optional) When true, an empty or missing message is not published
+      (e.g. a Timer poll with no due tasks). Defaults to false, publishing empty bodies as-is.
+    """
     queue: InArg[str]
     routing_key: InArg[str]
     exchange: InArg[str]
     message: InArg[str]
+    skip_empty: InArg[bool]
 
     def execute(self, ctx) -> None:
+        if self.skip_empty.value and not self.message.value:
+            log.debug("RabbitMQPublish: empty message, skipping publish.")
+            return
+
         channel = ctx['rabbitmq_channel']
 
-        if ctx.get('rabbitmq_queue') is None:
+        declared = ctx.setdefault('rabbitmq_declared', set())
+        if self.queue.value not in declared:
             channel.queue_declare(queue=self.queue.value)
+            declared.add(self.queue.value)
             ctx['rabbitmq_queue'] = self.queue.value
 
         exchange = '' if self.exchange.value is None else self.exchange.value
         routing_key = '' if self.routing_key.value is None else self.routing_key.value
 
-        channel.basic_publish(exchange=exchange, routing_key=routing_key, body=self.message.value)
+        body = self.message.value
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+
+        channel.basic_publish(exchange=exchange, routing_key=routing_key, body=body)
 
 
 @xai_component
@@ -534,8 +745,10 @@ class RabbitMQConsume(Component):
     def execute(self, ctx) -> None:
         channel = ctx['rabbitmq_channel']
 
-        if ctx.get('rabbitmq_queue') is None:
+        declared = ctx.setdefault('rabbitmq_declared', set())
+        if self.queue.value not in declared:
             channel.queue_declare(queue=self.queue.value)
+            declared.add(self.queue.value)
             ctx['rabbitmq_queue'] = self.queue.value
 
         channel.basic_consume(
@@ -566,7 +779,7 @@ class RabbitMQStartConsuming(Component):
         try:
             channel.start_consuming()
         except Exception as e:
-            print(e)
+            log.error("%s", e)
 
 
 @xai_component
@@ -578,13 +791,17 @@ class RabbitMQDisconnect(Component):
         try:
             client.close()
         except Exception as e:
-            print(e)
+            log.error("%s", e)
 
 @xai_component
 class RabbitMQPurgeQueue(Component):
     """
     Purges all messages from a RabbitMQ queue and retries if needed.
 
+    When RabbitMQConnect has opened a connection to the same broker, port, vhost and username
+    (unset inputs match anything), the purge runs on a short-lived channel of that connection;
+    otherwise a new connection is opened from the inputs.
+
     ##### inPorts:
     - broker: The RabbitMQ broker URL.
     - port: The RabbitMQ broker port.
@@ -605,13 +822,28 @@ class RabbitMQPurgeQueue(Component):
     queue: InArg[str]
 
     def execute(self, ctx) -> None:
+        # Reuse the RabbitMQConnect connection instead of a new TLS handshake. A separate channel
+        # is used so a broker error (e.g. missing queue) cannot close the shared consumer channel.
+        client = ctx.get('rabbitmq_client')
+        if client is not None and client.is_open and self._matches(ctx.get('rabbitmq_params')):
+            try:
+                channel = client.channel()
+                try:
+                    channel.queue_purge(queue=self.queue.value)
+                    log.debug("Successfully purged queue: %s", self.queue.value)
+                finally:
+                    if channel.is_open:
+                        channel.close()
+            except Exception as e:
+                log.error("Error purging queue: %s", e)
+            return
+
         retries = 3  #
         for attempt in range(retries):
             try:
-                print(f"🔄 Attempt {attempt+1} to purge queue: {self.queue.value}")
+                log.debug("Attempt %d to purge queue: %s", attempt + 1, self.queue.value)
 
-                # Create SSL context
-                ssl_context = ssl.create_default_context()
+                ssl_context = _SSL_CTX
 
                 # Establish connection to RabbitMQ
                 credentials = pika.PlainCredentials(self.username.value, self.password.value)
@@ -627,15 +859,23 @@ class RabbitMQPurgeQueue(Component):
 
                 # Purge the queue
                 channel.queue_purge(queue=self.queue.value)
-                print(f"Successfully purged queue: {self.queue.value}")
+                log.debug("Successfully purged queue: %s", self.queue.value)
 
                 # Close connection
                 connection.close()
                 break
 
             except pika.exceptions.StreamLostError:
-                print(f"StreamLostError: Retrying in 2 seconds...")
+                log.warning("StreamLostError: Retrying in 2 seconds...")
                 time.sleep(2)
             except Exception as e:
-                print(f"Error purging queue: {e}")
+                log.error("Error purging queue: %s", e)
                 break
+
+    def _matches(self, params) -> bool:
+        """Returns True if the set connection inputs agree with the cached connection parameters."""
+        if params is None:
+            return False
+        cached = (params.host, params.port, params.virtual_host, params.credentials.username)
+        wanted = (self.broker.value, self.port.value, self.vhost.value, self.username.value)
+        return all(w is None or w == c for w, c in zip(wanted, cached))